@@ -41,7 +41,10 @@ REFLECTIONS:
             whole thing in as a string, split wherever there were 2 newlines in
             a row, parse everything remaining into integers, then sum them
 """
-from typing import List
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 
 def parse_elf_inventories(input: List[str]) -> List[List[int]]:
@@ -58,10 +61,38 @@ def parse_elf_inventories(input: List[str]) -> List[List[int]]:
     return elf_inventories
 
 
-def part1(input: List[str]) -> int:
-    elf_inventories = parse_elf_inventories(input)
-    elf_calories = [sum(elf) for elf in elf_inventories]
-    return max(elf_calories)
+def iter_elf_calories(input: Iterable[str]) -> Iterator[int]:
+    """
+    Same grouping as `parse_elf_inventories`, but only keeps a running sum.
+    Lines can come straight from iterating an open file (which already reads
+    in buffered chunks); `int()` ignores the trailing newline
+    """
+    current_elf, has_items = 0, False
+    for item in input:
+        try:
+            current_elf += int(item)
+            has_items = True
+        except ValueError:
+            yield current_elf
+            current_elf, has_items = 0, False
+    if has_items:
+        yield current_elf
+
+
+def get_top_calories(input: Iterable[str], k: int) -> int:
+    """Sum of the k largest elf totals, keeping a min-heap of at most k items"""
+    assert k >= 1
+    top_elves: List[int] = []
+    for calories in iter_elf_calories(input):
+        if len(top_elves) < k:
+            heapq.heappush(top_elves, calories)
+        elif calories > top_elves[0]:
+            heapq.heapreplace(top_elves, calories)
+    return sum(top_elves)
+
+
+def part1(input: Iterable[str]) -> int:
+    return get_top_calories(input, k=1)
 
 
 def test_first_example():
@@ -70,10 +101,8 @@ def test_first_example():
     assert part1(test_input) == 24000
 
 
-def part2(input: List[str]):
-    elf_inventories = parse_elf_inventories(input)
-    elf_calories = [sum(elf) for elf in elf_inventories]
-    return sum(sorted(elf_calories)[-3:])
+def part2(input: Iterable[str]):
+    return get_top_calories(input, k=3)
 
 
 def test_second_example():
@@ -82,6 +111,128 @@ def test_second_example():
     assert part2(test_input) == 45000
 
 
+def get_elf_calories_bulk(input: str) -> List[int]:
+    # Parse the whole input in one go instead of line-by-line: split on the
+    # blank lines between elves, then let `map(int, ...)` do the conversions
+    return [sum(map(int, elf.split())) for elf in input.split("\n\n")]
+
+
+def get_top_calories_bulk(input: str, k: int) -> int:
+    return sum(heapq.nlargest(k, get_elf_calories_bulk(input)))
+
+
+def get_chunk_bounds(filename: str, num_chunks: int) -> List[Tuple[int, int]]:
+    # Split the file into roughly-even byte ranges, nudging each boundary
+    # forward to the start of a line so no number is cut in half
+    file_size = os.path.getsize(filename)
+    bounds = [0]
+    with open(filename, "rb") as file:
+        for i in range(1, num_chunks):
+            offset = max(file_size * i // num_chunks, bounds[-1] + 1)
+            if offset >= file_size:
+                break
+            file.seek(offset - 1)
+            file.readline()
+            if file.tell() > bounds[-1]:
+                bounds.append(file.tell())
+    if bounds[-1] != file_size:
+        bounds.append(file_size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def summarize_chunk(
+    filename: str, start: int, end: int, k: int
+) -> Tuple[Optional[int], List[int], int, bool]:
+    """
+    Returns (head, top_k, tail, tail_has_items) for the lines in [start, end).
+    The head is the sum of the elf cut off at the start of the chunk (None if
+    the chunk never reaches a blank line), and the tail is the elf still open
+    at the end; only elves fully inside the chunk are ranked in top_k
+    """
+    assert k >= 1
+    head: Optional[int] = None
+    top_elves: List[int] = []
+    current_elf, has_items = 0, False
+    with open(filename, "rb") as file:
+        file.seek(start)
+        # Read the range line by line (chunk bounds always start a new line),
+        # so only the running sum and the heap are ever kept around
+        position = start
+        for line in file:
+            if position >= end:
+                break
+            position += len(line)
+            try:
+                current_elf += int(line)
+                has_items = True
+                continue
+            except ValueError:
+                pass
+            if head is None:
+                head = current_elf
+            elif len(top_elves) < k:
+                heapq.heappush(top_elves, current_elf)
+            elif current_elf > top_elves[0]:
+                heapq.heapreplace(top_elves, current_elf)
+            current_elf, has_items = 0, False
+    return head, top_elves, current_elf, has_items
+
+
+def get_top_calories_parallel(
+    filename: str, k: int, num_workers: Optional[int] = None
+) -> int:
+    assert k >= 1
+    num_workers = num_workers or os.cpu_count() or 1
+    chunk_bounds = get_chunk_bounds(filename, num_workers)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        summaries = list(executor.map(
+            summarize_chunk,
+            [filename] * len(chunk_bounds),
+            [start for start, _ in chunk_bounds],
+            [end for _, end in chunk_bounds],
+            [k] * len(chunk_bounds),
+        ))
+
+    # Stitch the elves that straddle chunk boundaries back together: the open
+    # tail of one chunk continues into the head of the next
+    elf_calories: List[int] = []
+    open_elf, open_has_items = 0, False
+    for head, top_elves, tail, tail_has_items in summaries:
+        if head is None:
+            open_elf += tail
+            open_has_items = open_has_items or tail_has_items
+            continue
+        elf_calories.append(open_elf + head)
+        elf_calories += top_elves
+        open_elf, open_has_items = tail, tail_has_items
+    # Same as `parse_elf_inventories`, the last elf only counts if it had items
+    if open_has_items:
+        elf_calories.append(open_elf)
+    return sum(heapq.nlargest(k, elf_calories))
+
+
+def test_streamed_example():
+    with open("test.txt") as file:
+        assert get_top_calories(file, k=3) == 45000
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    elf_calories = [sum(elf) for elf in parse_elf_inventories(test_input)]
+    assert list(iter_elf_calories(test_input)) == elf_calories
+
+
+def test_bulk_example():
+    with open("test.txt") as file:
+        test_input = file.read()
+    assert get_top_calories_bulk(test_input, k=1) == 24000
+    assert get_top_calories_bulk(test_input, k=3) == 45000
+
+
+def test_parallel_example():
+    for num_workers in range(1, 8):
+        assert get_top_calories_parallel("test.txt", k=1, num_workers=num_workers) == 24000
+        assert get_top_calories_parallel("test.txt", k=3, num_workers=num_workers) == 45000
+
+
 if __name__ == "__main__":
     with open("input.txt") as file:
         input = file.read().splitlines()
@@ -94,3 +245,15 @@ if __name__ == "__main__":
     test_second_example()
     result = part2(input)
     print(f"part 2: {result}")
+    assert result == 202346
+
+    test_streamed_example()
+    with open("input.txt") as file:
+        assert get_top_calories(file, k=3) == result
+
+    test_bulk_example()
+    with open("input.txt") as file:
+        assert get_top_calories_bulk(file.read(), k=3) == result
+
+    test_parallel_example()
+    assert get_top_calories_parallel("input.txt", k=3) == result
@@ -43,7 +43,13 @@ REFLECTIONS:
 -   This was faster (~35 minutes to solve both parts), but it was also an easier
     problem IMO
 """
-from typing import List, Tuple
+import mmap
+import os
+import sys
+import tempfile
+from collections import Counter
+from itertools import permutations
+from typing import Dict, Iterable, List, Tuple
 
 
 opponent_shape = {
@@ -166,6 +172,154 @@ def test_second_example():
     assert part2(test_input) == 12
 
 
+def get_shape_score_table(response_shapes: Dict[str, str]) -> Dict[str, int]:
+    """Score of every possible "A X" line when X/Y/Z are read as shapes"""
+    return {
+        f"{opponent} {response}": get_round_score((opponent_shape[opponent], shape))
+        for opponent in opponent_shape
+        for response, shape in response_shapes.items()
+    }
+
+
+def get_outcome_score_table(response_outcomes: Dict[str, str]) -> Dict[str, int]:
+    """Score of every possible "A X" line when X/Y/Z are read as outcomes"""
+    return {
+        f"{opponent} {response}": get_round_score((
+            opponent_shape[opponent],
+            get_needed_shape(opponent_shape[opponent], outcome),
+        ))
+        for opponent in opponent_shape
+        for response, outcome in response_outcomes.items()
+    }
+
+
+part1_score_table = get_shape_score_table(response_shape)
+part2_score_table = get_outcome_score_table(response_outcome)
+
+
+def count_rounds(round_strs: Iterable[str]) -> Counter:
+    return Counter(round_str.strip() for round_str in round_strs)
+
+
+def score_round_counts(round_counts: Counter, score_table: Dict[str, int]) -> int:
+    # Only 9 distinct rounds are possible, so this is constant time no matter
+    # how many rounds were played
+    return sum(score_table[round_str] * n for round_str, n in round_counts.items())
+
+
+def get_byte_score_table(score_table: Dict[str, int]) -> Dict[int, int]:
+    # Key each round by its 4 bytes ("A X\n") read as one native uint32
+    return {
+        int.from_bytes(f"{round_str}\n".encode(), sys.byteorder): score
+        for round_str, score in score_table.items()
+    }
+
+
+part1_byte_score_table = get_byte_score_table(part1_score_table)
+part2_byte_score_table = get_byte_score_table(part2_score_table)
+
+
+def count_round_bytes(buffer) -> Counter:
+    """
+    Counts rounds in a buffer of fixed-width "A X\n" lines without decoding
+    or splitting it; each line is viewed in-place as a single uint32
+    """
+    line_width = 4
+    # Ignore any trailing newlines, so the last line is always the one
+    # missing its "\n"
+    end = len(buffer)
+    while end and buffer[end - 1] == ord("\n"):
+        end -= 1
+    num_full_bytes = end - end % line_width
+    with memoryview(buffer) as view, view[:num_full_bytes] as full_lines:
+        with full_lines.cast("I") as rounds:
+            round_counts = Counter(rounds)
+        last_line = bytes(view[num_full_bytes:end])
+    if last_line:
+        if len(last_line) != line_width - 1:
+            raise ValueError(
+                f"Expected {line_width}-byte \"A X\\n\" lines, but the input ends "
+                f"with {last_line!r}"
+            )
+        round_counts[int.from_bytes(last_line + b"\n", sys.byteorder)] += 1
+    return round_counts
+
+
+def get_mmap_scores(filename: str) -> Tuple[int, int]:
+    """Scores for both parts from a single pass over a memory-mapped file"""
+    with open(filename, "rb") as file:
+        # Empty files can't be memory-mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            return 0, 0
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            round_counts = count_round_bytes(buffer)
+    return (
+        sum(part1_byte_score_table[key] * n for key, n in round_counts.items()),
+        sum(part2_byte_score_table[key] * n for key, n in round_counts.items()),
+    )
+
+
+def get_all_score_tables() -> Dict[str, Dict[str, int]]:
+    """
+    Score tables for every way to read X/Y/Z: each shape permutation (keyed
+    like "RPS" for X=R, Y=P, Z=S) plus the "outcome" reading from part 2
+    """
+    score_tables = {}
+    for shapes in permutations(shape_scores):
+        response_shapes = dict(zip(response_shape, shapes))
+        score_tables["".join(shapes)] = get_shape_score_table(response_shapes)
+    score_tables["outcome"] = get_outcome_score_table(response_outcome)
+    return score_tables
+
+
+all_score_tables = get_all_score_tables()
+
+
+def score_all_interpretations(round_strs: Iterable[str]) -> Dict[str, int]:
+    round_counts = count_rounds(round_strs)
+    return {
+        name: score_round_counts(round_counts, score_table)
+        for name, score_table in all_score_tables.items()
+    }
+
+
+def test_round_counts_example():
+    with open("test.txt") as file:
+        round_counts = count_rounds(file)
+    assert score_round_counts(round_counts, part1_score_table) == 15
+    assert score_round_counts(round_counts, part2_score_table) == 12
+
+
+def test_all_interpretations_example():
+    with open("test.txt") as file:
+        scores = score_all_interpretations(file)
+    assert len(scores) == 7
+    assert scores["RPS"] == 15
+    assert scores["outcome"] == 12
+
+
+def test_mmap_example():
+    assert get_mmap_scores("test.txt") == (15, 12)
+
+
+def test_round_bytes_line_endings():
+    expected = count_round_bytes(b"A Y\nB X\nC Z\n")
+    assert count_round_bytes(b"A Y\nB X\nC Z") == expected
+    assert count_round_bytes(b"A Y\nB X\nC Z\n\n") == expected
+    assert count_round_bytes(b"") == Counter()
+    try:
+        count_round_bytes(b"A Y\nB X\nC\n")
+        rejected = False
+    except ValueError:
+        rejected = True
+    assert rejected
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        empty_file = os.path.join(temp_dir, "empty.txt")
+        open(empty_file, "wb").close()
+        assert get_mmap_scores(empty_file) == (0, 0)
+
+
 if __name__ == "__main__":
     with open("input.txt") as file:
         input = file.read().splitlines()
@@ -179,3 +333,15 @@ if __name__ == "__main__":
     result = part2(input)
     print(f"part 2: {result}")
     assert result == 13433
+
+    test_round_counts_example()
+    round_counts = count_rounds(input)
+    assert score_round_counts(round_counts, part1_score_table) == 13484
+    assert score_round_counts(round_counts, part2_score_table) == 13433
+
+    test_all_interpretations_example()
+    scores = score_all_interpretations(input)
+    assert scores["RPS"] == 13484 and scores["outcome"] == 13433
+
+    test_mmap_example()
+    assert get_mmap_scores("input.txt") == (13484, 13433)
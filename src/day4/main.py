@@ -44,7 +44,10 @@ REFLECTIONS:
     disable that, or make it require holding Fn or something?
 """
 import re
-from typing import List
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import and_, ge, le, or_
+from typing import List, Tuple
 
 
 def parse_section(section_str: str) -> List[int]:
@@ -96,6 +99,106 @@ def test_second_example():
     assert get_overlapping_pairs(test_input) == 4
 
 
+def parse_section_bounds(input: bytes) -> Tuple[array, array, array, array]:
+    """
+    Pulls every number out of the file in one regex scan, then splits them by
+    stride into 4 columns (a0, a1, b0, b1) - one row per pair. The matches are
+    streamed straight into the array, so it's the only full-size structure
+    """
+    num_matches = re.finditer(rb"\d+", input)
+    nums = array("q", map(int, map(re.Match.group, num_matches)))
+    assert len(nums) % 4 == 0
+    return nums[0::4], nums[1::4], nums[2::4], nums[3::4]
+
+
+def count_contained_and_overlapping(input: bytes) -> Tuple[int, int]:
+    # Comparing whole columns with `map` keeps the per-pair work in C
+    a0, a1, b0, b1 = parse_section_bounds(input)
+    a_contains_b = map(and_, map(le, a0, b0), map(ge, a1, b1))
+    b_contains_a = map(and_, map(le, b0, a0), map(ge, b1, a1))
+    num_contained = sum(map(or_, a_contains_b, b_contains_a))
+    num_overlapping = sum(map(and_, map(le, a0, b1), map(le, b0, a1)))
+    return num_contained, num_overlapping
+
+
+def test_bulk_example():
+    with open("test.txt", "rb") as file:
+        test_input = file.read()
+    assert count_contained_and_overlapping(test_input) == (2, 4)
+
+
+class SectionIndex:
+    """
+    Index over every elf's assignment (from all groups) for range queries.
+    Assignments are numbered in file order, i.e. the order `parse_groups`
+    returns them in when its groups are flattened.
+    """
+
+    def __init__(self, sections: List[List[int]]):
+        self.sections = sections
+        self.starts = sorted(start for start, _ in sections)
+        self.ends = sorted(end for _, end in sections)
+
+        # For listing matches: assignments sorted by start, plus a max-heap
+        # shaped tree holding the largest end in each block of that order
+        self.by_start = sorted(range(len(sections)), key=lambda i: sections[i][0])
+        self.leaf_offset = 1
+        while self.leaf_offset < len(sections):
+            self.leaf_offset *= 2
+        self.max_ends = [-1] * (2 * self.leaf_offset)
+        for i, section_id in enumerate(self.by_start):
+            self.max_ends[self.leaf_offset + i] = sections[section_id][1]
+        for node in range(self.leaf_offset - 1, 0, -1):
+            self.max_ends[node] = max(self.max_ends[2*node], self.max_ends[2*node + 1])
+
+    @classmethod
+    def from_groups(cls, groups: List[List[List[int]]]) -> "SectionIndex":
+        return cls([section for group in groups for section in group])
+
+    def count_overlapping(self, start: int, end: int) -> int:
+        # Anything ending before `start` also starts before `end`, so it can be
+        # subtracted straight from the assignments starting by `end`
+        return bisect_right(self.starts, end) - bisect_left(self.ends, start)
+
+    def count_covering(self, section: int) -> int:
+        return self.count_overlapping(section, section)
+
+    def find_overlapping(self, start: int, end: int) -> List[int]:
+        """Ids of assignments overlapping [start, end], in ascending order"""
+        num_candidates = bisect_right(self.starts, end)
+        found = []
+        # Walk the tree, only descending into blocks that start early enough
+        # and have at least one assignment ending late enough
+        nodes = [(1, 0, self.leaf_offset)]
+        while nodes:
+            node, lo, hi = nodes.pop()
+            if lo >= num_candidates or self.max_ends[node] < start:
+                continue
+            if node >= self.leaf_offset:
+                found.append(self.by_start[lo])
+                continue
+            mid = (lo + hi)//2
+            nodes.append((2*node + 1, mid, hi))
+            nodes.append((2*node, lo, mid))
+        return sorted(found)
+
+
+def test_section_index():
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    groups = parse_groups(test_input)
+    index = SectionIndex.from_groups(groups)
+    sections = index.sections
+    for start, end in [(1, 1), (3, 5), (6, 6), (9, 9), (0, 100), (50, 60)]:
+        expected = [
+            i for i, section in enumerate(sections)
+            if is_overlapping_pair([section, [start, end]])
+        ]
+        assert index.find_overlapping(start, end) == expected
+        assert index.count_overlapping(start, end) == len(expected)
+    assert index.count_covering(6) == 8
+
+
 if __name__ == "__main__":
     with open("input.txt") as file:
         input = file.read().splitlines()
@@ -108,3 +211,9 @@ if __name__ == "__main__":
     part2 = get_overlapping_pairs(input)
     print(f"part 2: {part2}")
     assert part2 == 779
+
+    test_bulk_example()
+    with open("input.txt", "rb") as file:
+        assert count_contained_and_overlapping(file.read()) == (459, 779)
+
+    test_section_index()
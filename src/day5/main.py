@@ -85,7 +85,8 @@ REFLECTIONS:
                 count the # of stacks in the first place
 """
 import re
-from typing import List, Tuple
+from array import array
+from typing import Iterator, List, Tuple
 
 
 def parse_initial_stacks(input: str) -> List[List[str]]:
@@ -124,16 +125,130 @@ def parse_stacks(input: List[str]) -> Tuple[List[List[str]], List[Tuple[int, int
     return parse_initial_stacks(initial_stack_input), parse_moves(moves_input)
 
 
+def parse_stacks_bytes(input: bytes) -> Tuple[List[List[str]], array]:
+    """
+    Like `parse_stacks`, but over the raw file bytes: each stack is read as a
+    strided column of the (padded) drawing, and all the move numbers are
+    pulled out in a single scan into a flat array of n, src, dest, n, ...
+    """
+    drawing, moves_input = input.split(b"\n\n", 1)
+    *crate_lines, label_line = drawing.splitlines()
+    num_stacks = (len(label_line) + 2)//4
+    width = num_stacks*4
+    # Trailing whitespace past the labels would throw off every column stride
+    padded_drawing = b"".join(line[:width].ljust(width) for line in crate_lines)
+    stacks = [
+        # Columns read top-down, so reverse them and drop the empty slots
+        list(padded_drawing[i*4 + 1::width][::-1].decode().rstrip())
+        for i in range(num_stacks)
+    ]
+    moves = array("i", map(int, map(re.Match.group, re.finditer(rb"\d+", moves_input))))
+    assert len(moves) % 3 == 0
+    return stacks, moves
+
+
+def iter_moves(moves: array) -> Iterator[Tuple[int, int, int]]:
+    return zip(moves[0::3], moves[1::3], moves[2::3])
+
+
 def apply_moves(stacks: List[List[str]], moves: List[Tuple[int, int, int]]):
     for n, src, dest in moves:
-        for i in range(n):
-            stacks[dest-1].append(stacks[src-1].pop())
+        if n == 0 or src == dest:
+            continue
+        # Moving one at a time just reverses the block, so do it all at once
+        stacks[dest-1].extend(reversed(stacks[src-1][-n:]))
+        del stacks[src-1][-n:]
 
 
 def apply_order_preserve_moves(stacks: List[List[str]], moves: List[Tuple[int, int, int]]):
     for n, src, dest in moves:
+        if n == 0 or src == dest:
+            continue
+        # Delete in-place so only the moved crates are copied, not the stack
         stacks[dest-1] += stacks[src-1][-n:]
-        stacks[src-1] = stacks[src-1][:-n]
+        del stacks[src-1][-n:]
+
+
+def test_block_moves():
+    stacks = [["A", "B", "C"], ["D"]]
+    apply_moves(stacks, [(2, 1, 2), (1, 2, 2), (0, 1, 2)])
+    assert stacks == [["A"], ["D", "C", "B"]]
+    apply_order_preserve_moves(stacks, [(2, 2, 1), (3, 1, 1)])
+    assert stacks == [["A", "C", "B"], ["D"]]
+
+
+def trace_top_crates(
+    stacks: List[List[str]],
+    moves: List[Tuple[int, int, int]],
+    preserve_order: bool = False,
+) -> str:
+    """
+    Gets the final top crates without moving any crates: each final top
+    position is followed backwards through the moves to its initial position.
+    Crates are tracked as (stack index, depth from the top)
+    """
+    # Only the stack heights are simulated forwards, to skip empty stacks
+    heights = [len(stack) for stack in stacks]
+    for n, src, dest in moves:
+        if n == 0 or src == dest:
+            continue
+        heights[src-1] -= n
+        heights[dest-1] += n
+    positions = [(i, 0) for i, height in enumerate(heights) if height > 0]
+
+    for n, src, dest in reversed(moves):
+        if n == 0 or src == dest:
+            continue
+        for i, (stack, depth) in enumerate(positions):
+            if stack == dest-1:
+                if depth < n:
+                    # Part of the moved block; CrateMover 9000 reversed it
+                    src_depth = depth if preserve_order else n - 1 - depth
+                    positions[i] = (src-1, src_depth)
+                else:
+                    positions[i] = (stack, depth - n)
+            elif stack == src-1:
+                positions[i] = (stack, depth + n)
+    return "".join(stacks[stack][-1 - depth] for stack, depth in positions)
+
+
+class MoveReplay:
+    """
+    Answers "what did the stacks look like after the first i moves?" by
+    restoring the nearest earlier snapshot and replaying from there. A
+    snapshot is stored every `checkpoint_interval` moves, with each stack
+    packed into a single string
+    """
+
+    def __init__(
+        self,
+        stacks: List[List[str]],
+        moves: List[Tuple[int, int, int]],
+        preserve_order: bool = False,
+        checkpoint_interval: int = 1000,
+    ):
+        assert checkpoint_interval > 0
+        self.moves = moves
+        self.apply = apply_order_preserve_moves if preserve_order else apply_moves
+        self.checkpoint_interval = checkpoint_interval
+
+        current_stacks = [list(stack) for stack in stacks]
+        self.snapshots = [self.pack(current_stacks)]
+        for i in range(0, len(moves), checkpoint_interval):
+            self.apply(current_stacks, moves[i:i+checkpoint_interval])
+            self.snapshots.append(self.pack(current_stacks))
+
+    @staticmethod
+    def pack(stacks: List[List[str]]) -> Tuple[str, ...]:
+        return tuple("".join(stack) for stack in stacks)
+
+    def state_after(self, num_moves: int) -> List[List[str]]:
+        assert 0 <= num_moves <= len(self.moves)
+        checkpoint = num_moves // self.checkpoint_interval
+        stacks = [list(stack) for stack in self.snapshots[checkpoint]]
+        start = checkpoint * self.checkpoint_interval
+        self.apply(stacks, self.moves[start:num_moves])
+        return stacks
 
 
 def part1(input: List[str]) -> str:
@@ -160,6 +275,39 @@ def test_second_example():
     assert part2(test_input) == "MCD"
 
 
+def test_trace_top_crates():
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    stacks, moves = parse_stacks(test_input)
+    assert trace_top_crates(stacks, moves) == "CMZ"
+    assert trace_top_crates(stacks, moves, preserve_order=True) == "MCD"
+
+
+def test_move_replay():
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    for preserve_order in [False, True]:
+        stacks, moves = parse_stacks(test_input)
+        replay = MoveReplay(stacks, moves, preserve_order, checkpoint_interval=3)
+        apply = apply_order_preserve_moves if preserve_order else apply_moves
+        for i in range(len(moves) + 1):
+            expected_stacks, _ = parse_stacks(test_input)
+            apply(expected_stacks, moves[:i])
+            assert replay.state_after(i) == expected_stacks
+
+
+def test_parse_stacks_bytes():
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    with open("test.txt", "rb") as file:
+        stacks, moves = parse_stacks_bytes(file.read())
+    assert (stacks, list(iter_moves(moves))) == parse_stacks(test_input)
+
+    padded_input = "\n".join(test_input).replace("    [D]", "    [D]      ", 1)
+    stacks, _ = parse_stacks_bytes(padded_input.encode())
+    assert stacks == parse_stacks(padded_input.splitlines())[0]
+
+
 if __name__ == "__main__":
     with open("input.txt") as file:
         input = file.read().splitlines()
@@ -172,4 +320,21 @@ if __name__ == "__main__":
     test_second_example()
     result = part2(input)
     print(f"part 2: {result}")
-    assert result == "RNLFDJMCT"
\ No newline at end of file
+    assert result == "RNLFDJMCT"
+
+    test_block_moves()
+
+    test_trace_top_crates()
+    stacks, moves = parse_stacks(input)
+    assert trace_top_crates(stacks, moves) == "HNSNMTLHQ"
+    assert trace_top_crates(stacks, moves, preserve_order=True) == "RNLFDJMCT"
+
+    test_move_replay()
+    replay = MoveReplay(stacks, moves, preserve_order=True, checkpoint_interval=50)
+    assert "".join(stack[-1] for stack in replay.state_after(len(moves))) == "RNLFDJMCT"
+
+    test_parse_stacks_bytes()
+    with open("input.txt", "rb") as file:
+        stacks, flat_moves = parse_stacks_bytes(file.read())
+    apply_moves(stacks, iter_moves(flat_moves))
+    assert "".join(stack[-1] for stack in stacks) == "HNSNMTLHQ"
@@ -37,6 +37,13 @@ REFLECTIONS:
         the exact same syntax, just different variable names)
 
 """
+import asyncio
+import mmap
+from itertools import accumulate, compress
+from operator import le
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+
 def find_packet_start_index(input: str, marker_size: int) -> int:
     for i in range(marker_size, len(input)):
         if len(set(input[i-marker_size:i])) == marker_size:
@@ -44,6 +51,97 @@ def find_packet_start_index(input: str, marker_size: int) -> int:
     return None
 
 
+class MarkerDetector:
+    """
+    Finds the first marker for every size incrementally, as chunks of the
+    stream arrive. Instead of building a set per window, this tracks where
+    each character was last seen and where the current run of all-distinct
+    characters started; a marker of size k ends wherever that run is first k
+    long. The state carries across chunk boundaries, and is bounded by the
+    alphabet size rather than the stream length
+    """
+
+    def __init__(self, marker_sizes: List[int]):
+        self.pending_sizes = sorted(marker_sizes)
+        self.last_seen: Dict[Union[str, int], int] = {}
+        self.run_start = 0
+        self.offset = 0
+
+    def is_done(self) -> bool:
+        return not self.pending_sizes
+
+    def feed(self, chunk: Union[str, bytes]) -> List[Tuple[int, int]]:
+        """Returns a (marker size, index) pair for each marker found"""
+        found = []
+        for i, char in enumerate(chunk, start=self.offset):
+            if not self.pending_sizes:
+                break
+            self.run_start = max(self.run_start, self.last_seen.get(char, -1) + 1)
+            self.last_seen[char] = i
+            run_length = i + 1 - self.run_start
+            while self.pending_sizes and run_length >= self.pending_sizes[0]:
+                found.append((self.pending_sizes.pop(0), i + 1))
+        self.offset += len(chunk)
+        return found
+
+
+def find_marker_indices(input: str, marker_sizes: List[int]) -> Dict[int, Optional[int]]:
+    marker_indices: Dict[int, Optional[int]] = {size: None for size in marker_sizes}
+    marker_indices.update(MarkerDetector(marker_sizes).feed(input))
+    return marker_indices
+
+
+def iter_stream_markers(
+    stream: BinaryIO, marker_sizes: List[int], chunk_size: int = 1 << 16
+) -> Iterator[Tuple[int, int]]:
+    detector = MarkerDetector(marker_sizes)
+    while not detector.is_done() and (chunk := stream.read(chunk_size)):
+        yield from detector.feed(chunk)
+
+
+async def aiter_stream_markers(
+    reader: asyncio.StreamReader, marker_sizes: List[int], chunk_size: int = 1 << 16
+) -> AsyncIterator[Tuple[int, int]]:
+    detector = MarkerDetector(marker_sizes)
+    while not detector.is_done() and (chunk := await reader.read(chunk_size)):
+        for marker in detector.feed(chunk):
+            yield marker
+
+
+def iter_all_marker_indices(
+    buffer: bytes, marker_size: int, block_size: int = 1 << 20
+) -> Iterator[int]:
+    """
+    Yields every index where the previous `marker_size` bytes are all
+    distinct (the first one is what `find_packet_start_index` returns). Works
+    a block at a time: record where each byte was previously seen, take a
+    running max of those to get where each all-distinct run starts, and keep
+    the positions whose run is long enough
+    """
+    last_seen = [-1] * 256
+    run_start = 0
+    for block_start in range(0, len(buffer), block_size):
+        block = buffer[block_start:block_start + block_size]
+        earliest_starts = []
+        for i, byte in enumerate(block, start=block_start):
+            earliest_starts.append(last_seen[byte] + 1)
+            last_seen[byte] = i
+        run_starts = list(accumulate(earliest_starts, max, initial=run_start))[1:]
+        run_start = run_starts[-1]
+        block_end = block_start + len(block)
+        latest_allowed_starts = range(block_start + 1 - marker_size, block_end + 1 - marker_size)
+        yield from compress(
+            range(block_start + 1, block_end + 1),
+            map(le, run_starts, latest_allowed_starts),
+        )
+
+
+def iter_all_marker_indices_in_file(filename: str, marker_size: int) -> Iterator[int]:
+    with open(filename, "rb") as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        yield from iter_all_marker_indices(buffer, marker_size)
+
+
 def part1(input: str):
     packet_start_index = find_packet_start_index(input, marker_size=4)
     assert packet_start_index is not None
@@ -68,6 +166,35 @@ def test_second_example():
     assert part2(test_input) == 19
 
 
+def test_marker_indices():
+    with open("test.txt") as file:
+        test_input = file.read()
+    assert find_marker_indices(test_input, [4, 14, 64]) == {4: 7, 14: 19, 64: None}
+    assert find_marker_indices("abcd", [1, 4]) == {1: 1, 4: 4}
+
+
+def test_stream_markers():
+    with open("test.txt", "rb") as file:
+        markers = list(iter_stream_markers(file, [4, 14], chunk_size=3))
+    assert markers == [(4, 7), (14, 19)]
+
+    async def read_markers() -> List[Tuple[int, int]]:
+        reader = asyncio.StreamReader()
+        with open("test.txt", "rb") as file:
+            reader.feed_data(file.read())
+        reader.feed_eof()
+        return [marker async for marker in aiter_stream_markers(reader, [4, 14], chunk_size=5)]
+
+    assert asyncio.run(read_markers()) == [(4, 7), (14, 19)]
+
+
+def test_all_marker_indices():
+    assert list(iter_all_marker_indices(b"abcabd", 3, block_size=2)) == [3, 4, 5, 6]
+    assert list(iter_all_marker_indices(b"aabbcc", 2, block_size=4)) == [3, 5]
+    assert next(iter_all_marker_indices_in_file("test.txt", 4)) == 7
+    assert next(iter_all_marker_indices_in_file("test.txt", 14)) == 19
+
+
 if __name__ == "__main__":
     with open("input.txt") as file:
         input = file.read()
@@ -81,3 +208,13 @@ if __name__ == "__main__":
     result = part2(input)
     print(f"part 2: {result}")
     assert result == 3588
+
+    test_marker_indices()
+    assert find_marker_indices(input, [4, 14]) == {4: 1582, 14: 3588}
+
+    test_stream_markers()
+    with open("input.txt", "rb") as file:
+        assert list(iter_stream_markers(file, [4, 14])) == [(4, 1582), (14, 3588)]
+
+    test_all_marker_indices()
+    assert next(iter_all_marker_indices_in_file("input.txt", 14)) == 3588
@@ -30,9 +30,16 @@ REFLECTIONS:
         -   The 1st part solution is literally identical, just in Python (and he used the `Path` class instead of an array) - and, I guess, he only cared about 2 cases (because of the Path class, was able to handle the `cd ..` command for free)
         -   For the 2nd part, also did the same thing - filtered, then took the min (I guess that is simpler to fit into headspace than sorting and searching; neat)
 """
+import mmap
+import os
+import pickle
 import re
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 @dataclass
@@ -53,25 +60,26 @@ class File:
 
     @classmethod
     def update_size(cls, current_dir: Optional["File"], change_size: int):
-        if current_dir is None:
-            return
-        current_dir.size += change_size
-        cls.update_size(current_dir.parent, change_size)
+        while current_dir is not None:
+            current_dir.size += change_size
+            current_dir = current_dir.parent
 
     @classmethod
     def get_root(cls, current_dir: "File"):
-        if current_dir.parent is None:
-            return current_dir
-        return cls.get_root(current_dir.parent)
+        while current_dir.parent is not None:
+            current_dir = current_dir.parent
+        return current_dir
 
     @classmethod
     def get_directories(cls, root: "File") -> List["File"]:
-        # Get directories via BFS
+        # Get directories via DFS (pre-order, same as the old recursive one)
         dirs = []
-        if root.is_dir():
-            dirs.append(root)
-        for _, file in root.children.items():
-            dirs += cls.get_directories(file)
+        files = [root]
+        while files:
+            file = files.pop()
+            if file.is_dir():
+                dirs.append(file)
+            files.extend(reversed(file.children.values()))
         return dirs
 
 
@@ -111,10 +119,352 @@ def get_file_structure(input: List[str]) -> File:
     return current_dir
 
 
+class FileTree:
+    """
+    Compact alternative to `File`: every entry is an integer id, with its
+    parent, size, name and type kept in parallel arrays (the root is id 0).
+    Directory sizes aren't updated as files are added; call
+    `aggregate_sizes()` once the whole tree has been built. After that, any
+    new file's size is added to its ancestors straight away (calling
+    `on_dir_resize(old_size, new_size)` for each one, if it's set)
+    """
+
+    ROOT = 0
+
+    def __init__(self):
+        self.parents = array("q", [-1])
+        self.sizes = array("q", [0])
+        self.names: List[str] = ["/"]
+        self.is_dirs = bytearray([1])
+        self.child_ids: Dict[Tuple[int, str], int] = {}
+        self.sizes_aggregated = False
+        self.on_dir_resize: Optional[Callable[[int, int], None]] = None
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def add_entry(self, parent: int, name: str, size: int, is_dir: bool) -> int:
+        # An entry listed twice (e.g. from a repeated `ls`) keeps its first id
+        entry_id = self.child_ids.get((parent, name))
+        if entry_id is not None:
+            return entry_id
+        entry_id = len(self.parents)
+        self.parents.append(parent)
+        self.sizes.append(size)
+        self.names.append(name)
+        self.is_dirs.append(is_dir)
+        self.child_ids[(parent, name)] = entry_id
+        if self.sizes_aggregated and size:
+            self.grow_ancestors(entry_id, size)
+        return entry_id
+
+    def grow_ancestors(self, entry_id: int, change_size: int):
+        dir_id = self.parents[entry_id]
+        while dir_id != -1:
+            old_size = self.sizes[dir_id]
+            self.sizes[dir_id] += change_size
+            if self.on_dir_resize:
+                self.on_dir_resize(old_size, old_size + change_size)
+            dir_id = self.parents[dir_id]
+
+    def add_dir(self, parent: int, name: str) -> int:
+        return self.add_entry(parent, name, 0, True)
+
+    def add_file(self, parent: int, name: str, size: int) -> int:
+        return self.add_entry(parent, name, size, False)
+
+    def aggregate_sizes(self):
+        # Children always get higher ids than their parents, so walking the
+        # ids backwards visits every entry before its parent (a post-order)
+        assert not self.sizes_aggregated
+        parents, sizes = self.parents, self.sizes
+        for entry_id in range(len(parents) - 1, 0, -1):
+            sizes[parents[entry_id]] += sizes[entry_id]
+        self.sizes_aggregated = True
+
+    def to_snapshot(self) -> dict:
+        assert self.sizes_aggregated
+        return {
+            "parents": self.parents,
+            "sizes": self.sizes,
+            "names": self.names,
+            "is_dirs": bytes(self.is_dirs),
+            "child_ids": self.child_ids,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> "FileTree":
+        tree = cls()
+        tree.parents = snapshot["parents"]
+        tree.sizes = snapshot["sizes"]
+        tree.names = snapshot["names"]
+        tree.is_dirs = bytearray(snapshot["is_dirs"])
+        tree.child_ids = snapshot["child_ids"]
+        tree.sizes_aggregated = True
+        return tree
+
+    def iter_directories(self) -> Iterator[int]:
+        return (entry_id for entry_id, is_dir in enumerate(self.is_dirs) if is_dir)
+
+    def get_directory_sizes(self) -> List[int]:
+        assert self.sizes_aggregated
+        return [self.sizes[dir_id] for dir_id in self.iter_directories()]
+
+
+class DirectorySizeIndex:
+    """
+    Directory sizes sorted once (with prefix sums) for threshold queries,
+    plus a lookup from each directory's full path (e.g. "/a/e") to its size
+    """
+
+    def __init__(self, tree: FileTree):
+        assert tree.sizes_aggregated
+        self.sizes_by_path: Dict[str, int] = {}
+        # Parents have lower ids than their children, so their paths are
+        # always ready first
+        paths: Dict[int, str] = {FileTree.ROOT: "/"}
+        for dir_id in tree.iter_directories():
+            if dir_id != FileTree.ROOT:
+                parent_path = paths[tree.parents[dir_id]]
+                paths[dir_id] = f"{parent_path.rstrip('/')}/{tree.names[dir_id]}"
+            self.sizes_by_path[paths[dir_id]] = tree.sizes[dir_id]
+        self.sorted_sizes = sorted(self.sizes_by_path.values())
+        self.prefix_sums = list(accumulate(self.sorted_sizes, initial=0))
+
+    def sum_at_most(self, max_size: int) -> int:
+        return self.prefix_sums[bisect_right(self.sorted_sizes, max_size)]
+
+    def smallest_at_least(self, min_size: int) -> int:
+        i = bisect_left(self.sorted_sizes, min_size)
+        if i == len(self.sorted_sizes):
+            raise ValueError("No directory big enough to delete")
+        return self.sorted_sizes[i]
+
+    def size_of(self, path: str) -> int:
+        return self.sizes_by_path[path]
+
+
+def apply_log_line(tree: FileTree, current_dir: int, line: str) -> int:
+    """Adds whatever the terminal line shows to the tree; returns the new cwd"""
+    parts = line.split()
+    if parts[0] == "$":
+        if parts[1] != "cd":
+            return current_dir
+        if parts[2] == "/":
+            return FileTree.ROOT
+        if parts[2] == "..":
+            return tree.parents[current_dir]
+        return tree.add_dir(current_dir, parts[2])
+    if parts[0] == "dir":
+        tree.add_dir(current_dir, parts[1])
+    else:
+        tree.add_file(current_dir, parts[1], int(parts[0]))
+    return current_dir
+
+
+def get_file_tree(input: List[str]) -> FileTree:
+    tree = FileTree()
+    current_dir = FileTree.ROOT
+    for line in input:
+        current_dir = apply_log_line(tree, current_dir, line)
+    tree.aggregate_sizes()
+    return tree
+
+
+def apply_log_text(text: str, tree: FileTree, current_dir: int = FileTree.ROOT) -> int:
+    """
+    Faster `apply_log_line` for a whole block of log lines at once: each line
+    is classified by its first characters (no regex, no `split()`) and fed
+    straight to the tree's `add_dir`/`add_file`
+    """
+    parents = tree.parents
+    for line in text.splitlines():
+        first_char = line[:1]
+        if first_char == "$":
+            if line[2] != "c":
+                continue  # `$ ls`
+            dir_name = line[5:]
+            if dir_name == "/":
+                current_dir = FileTree.ROOT
+            elif dir_name == "..":
+                current_dir = parents[current_dir]
+            else:
+                current_dir = tree.add_dir(current_dir, dir_name)
+        elif first_char == "d":
+            tree.add_dir(current_dir, line[4:])
+        elif first_char:
+            size, _, name = line.partition(" ")
+            tree.add_file(current_dir, name, int(size))
+    return current_dir
+
+
+def get_file_tree_from_file(filename: str, block_size: int = 1 << 22) -> FileTree:
+    """
+    Builds the tree from a memory-mapped log, decoding and splitting it in
+    large blocks (a partial last line is carried over to the next block)
+    """
+    tree = FileTree()
+    current_dir = FileTree.ROOT
+    leftover = b""
+    with open(filename, "rb") as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for start in range(0, len(buffer), block_size):
+            block = leftover + buffer[start:start + block_size]
+            block_end = block.rfind(b"\n") + 1
+            leftover = block[block_end:]
+            current_dir = apply_log_text(block[:block_end].decode(), tree, current_dir)
+    apply_log_text(leftover.decode(), tree, current_dir)
+    tree.aggregate_sizes()
+    return tree
+
+
+class SortedSizes:
+    """
+    A sorted multiset of sizes, kept as a list of sorted buckets of bounded
+    length. Adding/removing only shifts one bucket, so updates stay cheap no
+    matter how many directories there are (unlike `insort` on a flat list)
+    """
+
+    bucket_size = 512
+
+    def __init__(self, sizes: Iterable[int] = ()):
+        sizes = sorted(sizes)
+        self.buckets = [
+            sizes[i:i + self.bucket_size] for i in range(0, len(sizes), self.bucket_size)
+        ]
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+
+    @classmethod
+    def from_buckets(cls, buckets: List[List[int]]) -> "SortedSizes":
+        """Restores already-sorted buckets (e.g. from a snapshot) as-is"""
+        sorted_sizes = cls()
+        sorted_sizes.buckets = buckets
+        sorted_sizes.maxes = [bucket[-1] for bucket in buckets]
+        return sorted_sizes
+
+    def __len__(self) -> int:
+        return sum(map(len, self.buckets))
+
+    def __iter__(self) -> Iterator[int]:
+        return (size for bucket in self.buckets for size in bucket)
+
+    def add(self, size: int):
+        if not self.buckets:
+            self.buckets.append([size])
+            self.maxes.append(size)
+            return
+        i = min(bisect_left(self.maxes, size), len(self.buckets) - 1)
+        bucket = self.buckets[i]
+        insort(bucket, size)
+        self.maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.bucket_size:
+            self.buckets[i:i+1] = [bucket[:self.bucket_size], bucket[self.bucket_size:]]
+            self.maxes[i:i+1] = [bucket[self.bucket_size - 1], bucket[-1]]
+
+    def remove(self, size: int):
+        i = bisect_left(self.maxes, size)
+        bucket = self.buckets[i]
+        bucket.pop(bisect_left(bucket, size))
+        if bucket:
+            self.maxes[i] = bucket[-1]
+        else:
+            del self.buckets[i]
+            del self.maxes[i]
+
+    def smallest_at_least(self, min_size: int) -> Optional[int]:
+        i = bisect_left(self.maxes, min_size)
+        if i == len(self.buckets):
+            return None
+        bucket = self.buckets[i]
+        return bucket[bisect_left(bucket, min_size)]
+
+
+class ShellSession:
+    """
+    A tree plus the current working directory, so a growing terminal log can
+    be applied a few lines at a time (and saved/loaded between runs) instead
+    of being re-parsed from the start. The part 1/2 answers are kept up to
+    date as sizes change, so they only cost as much as the new lines
+    """
+
+    small_dir_size = 100000
+    total_space, required_space = 70000000, 30000000
+
+    def __init__(
+        self,
+        tree: Optional[FileTree] = None,
+        current_dir: int = FileTree.ROOT,
+        dir_sizes: Optional[SortedSizes] = None,
+        small_dirs_total: Optional[int] = None,
+    ):
+        self.tree = tree or FileTree()
+        if not self.tree.sizes_aggregated:
+            self.tree.aggregate_sizes()
+        self.tree.on_dir_resize = self.on_dir_resize
+        self.current_dir = current_dir
+        # Only sort/sum the sizes if they weren't restored from a snapshot
+        if dir_sizes is None:
+            dir_sizes = SortedSizes(self.tree.get_directory_sizes())
+        self.dir_sizes = dir_sizes
+        if small_dirs_total is None:
+            small_dirs_total = sum(
+                size for size in self.dir_sizes if size <= self.small_dir_size
+            )
+        self.small_dirs_total = small_dirs_total
+
+    def on_dir_resize(self, old_size: int, new_size: int):
+        self.dir_sizes.remove(old_size)
+        self.dir_sizes.add(new_size)
+        if old_size <= self.small_dir_size:
+            self.small_dirs_total -= old_size
+        if new_size <= self.small_dir_size:
+            self.small_dirs_total += new_size
+
+    def apply_lines(self, lines: Iterable[str]):
+        for line in lines:
+            if not line.strip():
+                continue
+            num_entries = len(self.tree)
+            self.current_dir = apply_log_line(self.tree, self.current_dir, line)
+            # New (empty) directories start out in the size index at 0
+            for entry_id in range(num_entries, len(self.tree)):
+                if self.tree.is_dirs[entry_id]:
+                    self.dir_sizes.add(0)
+
+    def get_small_dirs_total(self) -> int:
+        return self.small_dirs_total
+
+    def get_smallest_dir_to_delete(self) -> int:
+        space_available = self.total_space - self.tree.sizes[FileTree.ROOT]
+        space_needed = self.required_space - space_available
+        dir_size = self.dir_sizes.smallest_at_least(space_needed)
+        if dir_size is None:
+            raise ValueError("No directory big enough to delete")
+        return dir_size
+
+    def save(self, filename: str):
+        snapshot = self.tree.to_snapshot()
+        snapshot["current_dir"] = self.current_dir
+        snapshot["dir_size_buckets"] = self.dir_sizes.buckets
+        snapshot["small_dirs_total"] = self.small_dirs_total
+        with open(filename, "wb") as file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename: str) -> "ShellSession":
+        with open(filename, "rb") as file:
+            snapshot = pickle.load(file)
+        return cls(
+            FileTree.from_snapshot(snapshot),
+            snapshot["current_dir"],
+            SortedSizes.from_buckets(snapshot["dir_size_buckets"]),
+            snapshot["small_dirs_total"],
+        )
+
+
 def part1(input: str) -> int:
-    root_directory = get_file_structure(input.splitlines())
-    directories = File.get_directories(root_directory)
-    return sum(dir.size for dir in directories if dir.size <= 100000)
+    tree = get_file_tree(input.splitlines())
+    return DirectorySizeIndex(tree).sum_at_most(100000)
 
 
 def test_first_example():
@@ -124,15 +474,11 @@ def test_first_example():
 
 
 def part2(input: str):
-    root_directory = get_file_structure(input.splitlines())
-    directories = File.get_directories(root_directory)
+    tree = get_file_tree(input.splitlines())
     total_space, required_space = 70000000, 30000000
-    space_available = total_space - root_directory.size
+    space_available = total_space - tree.sizes[FileTree.ROOT]
     space_needed = (required_space - space_available)
-    for dir in sorted(directories, key=lambda x: x.size):
-        if dir.size >= space_needed:
-            return dir.size
-    raise ValueError("No directory big enough to delete")
+    return DirectorySizeIndex(tree).smallest_at_least(space_needed)
 
 
 def test_second_example():
@@ -141,6 +487,84 @@ def test_second_example():
     assert part2(test_input) == 24933642
 
 
+def test_file_tree():
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    tree = get_file_tree(test_input)
+    root_directory = get_file_structure(test_input)
+    assert tree.sizes[FileTree.ROOT] == root_directory.size == 48381165
+    assert sorted(tree.get_directory_sizes()) == sorted(
+        dir.size for dir in File.get_directories(root_directory)
+    )
+
+
+def test_directory_size_index():
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    index = DirectorySizeIndex(get_file_tree(test_input))
+    assert index.size_of("/") == 48381165
+    assert index.size_of("/a") == 94853
+    assert index.size_of("/a/e") == 584
+    assert index.sum_at_most(100000) == 95437
+    assert index.smallest_at_least(8381165) == 24933642
+
+    root_directory = get_file_structure(test_input)
+    assert [dir.name for dir in File.get_directories(root_directory)] == ["/", "a", "e", "d"]
+
+
+def test_shell_session():
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    # Split the log partway through a listing (ending on a blank line, like a
+    # trailing newline would leave), and restore from disk between
+    session = ShellSession()
+    session.apply_lines(test_input[:12] + [""])
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_file = os.path.join(snapshot_dir, "snapshot.pickle")
+        session.save(snapshot_file)
+        session = ShellSession.load(snapshot_file)
+    assert session.tree.child_ids == get_file_tree(test_input[:12]).child_ids
+    session.apply_lines(test_input[12:])
+    assert session.get_small_dirs_total() == 95437
+    assert session.get_smallest_dir_to_delete() == 24933642
+    assert list(session.dir_sizes) == sorted(get_file_tree(test_input).get_directory_sizes())
+
+
+def test_shell_session_many_appends():
+    # A deep, wide tree built up over many small appends should give the
+    # same answers as parsing the whole log at once
+    log = ["$ cd /"]
+    for branch in range(300):
+        log += ["$ ls", f"dir b{branch}", f"$ cd b{branch}"]
+        for depth in range(10):
+            log += ["$ ls", f"{branch * 37 + depth * 1009} f{depth}", f"dir d{depth}"]
+            log.append(f"$ cd d{depth}")
+        log.append("$ cd /")
+    session = ShellSession()
+    for i in range(0, len(log), 50):
+        session.apply_lines(log[i:i+50])
+        if i % 1000 == 0:
+            assert session.get_small_dirs_total() == DirectorySizeIndex(
+                get_file_tree(log[:i+50])
+            ).sum_at_most(100000)
+    tree = get_file_tree(log)
+    assert list(session.dir_sizes) == sorted(tree.get_directory_sizes())
+    assert session.get_smallest_dir_to_delete() == DirectorySizeIndex(tree).smallest_at_least(
+        ShellSession.required_space - (ShellSession.total_space - tree.sizes[FileTree.ROOT])
+    )
+
+
+def test_log_text():
+    with open("test.txt") as file:
+        test_input = file.read().splitlines()
+    expected_tree = get_file_tree(test_input)
+    tree = get_file_tree_from_file("test.txt", block_size=16)
+    assert tree.parents == expected_tree.parents
+    assert tree.names == expected_tree.names
+    assert tree.sizes == expected_tree.sizes
+    assert tree.is_dirs == expected_tree.is_dirs
+
+
 if __name__ == "__main__":
     with open("input.txt") as file:
         input = file.read()
@@ -154,3 +578,19 @@ if __name__ == "__main__":
     result = part2(input)
     print(f"part 2: {result}")
     assert result == 4978279
+
+    test_file_tree()
+    test_directory_size_index()
+
+    test_shell_session()
+    test_shell_session_many_appends()
+    session = ShellSession()
+    lines = input.splitlines()
+    for i in range(0, len(lines), 100):
+        session.apply_lines(lines[i:i+100])
+    assert session.get_small_dirs_total() == 1844187
+    assert session.get_smallest_dir_to_delete() == 4978279
+
+    test_log_text()
+    index = DirectorySizeIndex(get_file_tree_from_file("input.txt"))
+    assert index.sum_at_most(100000) == 1844187
@@ -26,8 +26,14 @@ REFLECTIONS:
         -   First part was very similar ot my solution; read the grid, iterated over rows/cols, then in the 4 directions like how I did, but then used Python's all() + or function to check visibility for each direction
         -   For the 2nd part, I actually think I had a cleaner solution (he did the same thing, but without the reversal, and he had 4 for loops)
 """
+import mmap
+import os
+import tempfile
+from array import array
+from itertools import accumulate
 from math import prod
-from typing import List
+from operator import gt, or_
+from typing import Iterator, List, Sequence, Tuple
 
 
 def get_grid(input: str) -> List[List[int]]:
@@ -38,7 +44,51 @@ def get_grid(input: str) -> List[List[int]]:
     return rows
 
 
-def is_visible(grid: List[List[int]], row: int, col: int) -> bool:
+class DigitGrid:
+    """
+    A digit map stored as one byte per tree (the digit's value, not its
+    character), with each row exposed as a memoryview slice of the buffer -
+    so indexing works like the list-of-lists grid, without an `int` object
+    per cell
+    """
+
+    digit_values = bytes.maketrans(b"0123456789", bytes(range(10)))
+
+    def __init__(self, digits: bytearray, width: int):
+        self.width = width
+        self.stride = width + 1  # skip the newline at the end of each row
+        self.num_rows = (len(digits) + 1) // self.stride
+        assert len(digits) in (self.num_rows * self.stride, self.num_rows * self.stride - 1)
+        self.view = memoryview(digits)
+
+    @classmethod
+    def from_file(cls, filename: str, chunk_size: int = 1 << 20) -> "DigitGrid":
+        with open(filename, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            width = buffer.find(b"\n")
+            width = len(buffer) if width == -1 else width
+            assert not buffer[:width].endswith(b"\r"), "CRLF line endings aren't supported"
+            digits = bytearray(len(buffer))
+            # Convert a chunk at a time so there's never a 2nd full-size copy
+            for start in range(0, len(buffer), chunk_size):
+                chunk = buffer[start:start + chunk_size]
+                digits[start:start + len(chunk)] = chunk.translate(cls.digit_values)
+        return cls(digits, width)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, row: int) -> memoryview:
+        if not 0 <= row < self.num_rows:
+            raise IndexError(row)
+        start = row * self.stride
+        return self.view[start:start + self.width]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        return (self[row] for row in range(self.num_rows))
+
+
+def is_visible(grid: Sequence[Sequence[int]], row: int, col: int) -> bool:
     if (not (0 < row < len(grid))) or (not (0 < col < len(grid[0]))):
         return True
     tree_height = grid[row][col]
@@ -56,13 +106,48 @@ def is_visible(grid: List[List[int]], row: int, col: int) -> bool:
     return False
 
 
-def get_num_trees_visible(grid: List[List[int]]) -> int:
-    num_visible = 0
-    for row in range(len(grid)):
-        for col in range(len(grid[0])):
-            if is_visible(grid, row, col):
-                num_visible += 1
-    return num_visible
+def get_visible_from_start(heights: Sequence[int]) -> List[bool]:
+    # A tree is visible from the start if it's taller than every tree before
+    # it, i.e. taller than the running max up to (but not including) itself
+    tallest_before = accumulate(heights, max, initial=-1)
+    return list(map(gt, heights, tallest_before))
+
+
+def get_visible_from_either_end(heights: Sequence[int]) -> List[bool]:
+    from_start = get_visible_from_start(heights)
+    from_end = get_visible_from_start(heights[::-1])
+    return list(map(or_, from_start, reversed(from_end)))
+
+
+def iter_visibility_rows(grid: Sequence[Sequence[int]]) -> Iterator[bytes]:
+    """
+    Yields each row's visibility (1 byte per tree) from running-max sweeps.
+    Left/right and from-above are worked out as each row is reached; only the
+    from-below sweep has to be done up-front, into a 1-byte-per-tree buffer
+    """
+    num_rows = len(grid)
+    width = len(grid[0]) if num_rows else 0
+    from_below = bytearray(num_rows * width)
+    tallest = [-1] * width
+    for row in range(num_rows - 1, -1, -1):
+        heights = grid[row]
+        from_below[row*width:(row + 1)*width] = bytes(map(gt, heights, tallest))
+        tallest = list(map(max, heights, tallest))
+
+    tallest = [-1] * width
+    for row, heights in enumerate(grid):
+        from_above = map(gt, heights, tallest)
+        tallest = list(map(max, heights, tallest))
+        from_above_or_below = map(or_, from_above, from_below[row*width:(row + 1)*width])
+        yield bytes(map(or_, from_above_or_below, get_visible_from_either_end(heights)))
+
+
+def get_visibility_mask(grid: Sequence[Sequence[int]]) -> List[bytes]:
+    return list(iter_visibility_rows(grid))
+
+
+def get_num_trees_visible(grid: Sequence[Sequence[int]]) -> int:
+    return sum(map(sum, iter_visibility_rows(grid)))
 
 
 def part1(input: str) -> int:
@@ -76,11 +161,20 @@ def test_first_example():
     assert part1(test_input) == 21
 
 
-def scenic_score(grid: List[List[int]], row: int, col: int) -> int:
+def test_visibility_mask():
+    with open("test.txt") as file:
+        grid = get_grid(file.read())
+    assert [list(map(bool, row)) for row in get_visibility_mask(grid)] == [
+        [is_visible(grid, row, col) for col in range(len(grid[0]))]
+        for row in range(len(grid))
+    ]
+
+
+def scenic_score(grid: Sequence[Sequence[int]], row: int, col: int) -> int:
     tree_height = grid[row][col]
 
-    left_heights = grid[row][0:col]
-    right_heights = grid[row][col+1:]
+    left_heights = list(grid[row][0:col])
+    right_heights = list(grid[row][col+1:])
     above_heights = [grid[i][col] for i in range(row)]
     below_heights = [grid[i][col] for i in range(row+1, len(grid))]
 
@@ -96,11 +190,10 @@ def scenic_score(grid: List[List[int]], row: int, col: int) -> int:
             if height >= tree_height:
                 break
         direction_scores.append(trees_visible)
-    print(direction_scores)
     return prod(direction_scores)
 
 
-def get_scenic_scores(grid: List[List[int]]) -> List[int]:
+def get_scenic_scores(grid: Sequence[Sequence[int]]) -> List[int]:
     scores = []
     for row in range(len(grid)):
         for col in range(len(grid[0])):
@@ -108,10 +201,80 @@ def get_scenic_scores(grid: List[List[int]]) -> List[int]:
     return scores
 
 
+def get_viewing_distances(heights: Sequence[int]) -> List[int]:
+    """
+    How far each tree can see back towards the start of the line. Keeps a
+    stack of trees with decreasing heights; anything shorter than the current
+    tree can't block a later view, so it's popped for good (O(n) overall)
+    """
+    distances = []
+    blockers: List[int] = []
+    for i, height in enumerate(heights):
+        while blockers and heights[blockers[-1]] < height:
+            blockers.pop()
+        distances.append(i - blockers[-1] if blockers else i)
+        blockers.append(i)
+    return distances
+
+
+def get_viewing_distances_both_ways(heights: Sequence[int]) -> List[int]:
+    to_start = get_viewing_distances(heights)
+    to_end = get_viewing_distances(heights[::-1])
+    return list(map(int.__mul__, to_start, reversed(to_end)))
+
+
+def iter_scenic_scores(grid: Sequence[Sequence[int]]) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yields (row, col, score) for every tree (not in order) from one top-down
+    pass, keeping only O(width) state. Left/right distances come from the
+    row's monotonic stacks. Each column also keeps a monotonic stack, of the
+    trees still waiting for a tree at least as tall below them; popping one
+    finishes its score (that's its down distance), and whatever stops the
+    popping is the new tree's up blocker
+    """
+    num_rows = len(grid)
+    width = len(grid[0]) if num_rows else 0
+    pending: List[List[Tuple[int, int, int]]] = [[] for _ in range(width)]
+    for row, heights in enumerate(grid):
+        row_scores = get_viewing_distances_both_ways(heights)
+        for col_pending, height, row_score, col in zip(pending, heights, row_scores, range(width)):
+            blocker_row = None
+            while col_pending and col_pending[-1][0] <= height:
+                pending_height, pending_row, partial_score = col_pending.pop()
+                yield pending_row, col, partial_score * (row - pending_row)
+                # An equal-height tree blocks the view up, but a shorter one doesn't
+                blocker_row = pending_row if pending_height == height else None
+            if blocker_row is None:
+                blocker_row = col_pending[-1][1] if col_pending else 0
+            col_pending.append((height, row, row_score * (row - blocker_row)))
+    for col, col_pending in enumerate(pending):
+        for _, pending_row, partial_score in col_pending:
+            yield pending_row, col, partial_score * (num_rows - 1 - pending_row)
+
+
+def get_scenic_score_matrix(grid: Sequence[Sequence[int]]) -> List[array]:
+    width = len(grid[0]) if len(grid) else 0
+    # Scores are products of 4 distances, so they can easily pass 2^32
+    matrix = [array("Q", bytes(8 * width)) for _ in range(len(grid))]
+    for row, col, score in iter_scenic_scores(grid):
+        matrix[row][col] = score
+    return matrix
+
+
+def get_best_scenic_location(grid: Sequence[Sequence[int]]) -> Tuple[int, Tuple[int, int]]:
+    """Returns the highest scenic score and its (row, col), first in row order"""
+    best_row, best_col, best_score = max(
+        iter_scenic_scores(grid),
+        key=lambda tree: (tree[2], -tree[0], -tree[1]),
+        default=(-1, -1, -1),
+    )
+    return best_score, (best_row, best_col)
+
+
 def part2(input: str):
     grid = get_grid(input)
-    scenic_scores = get_scenic_scores(grid)
-    return max(scenic_scores)
+    best_score, _ = get_best_scenic_location(grid)
+    return best_score
 
 
 def test_second_example():
@@ -121,16 +284,62 @@ def test_second_example():
     assert part2(test_input) == 8
 
 
+def test_scenic_score_matrix():
+    with open("test.txt") as file:
+        grid = get_grid(file.read())
+    assert [list(row) for row in get_scenic_score_matrix(grid)] == [
+        [scenic_score(grid, row, col) for col in range(len(grid[0]))]
+        for row in range(len(grid))
+    ]
+    assert get_best_scenic_location(grid) == (8, (3, 2))
+
+    # One tall tree in the middle of a flat 601x601 grid sees 300 trees in
+    # every direction, for a score of 300^4 (more than fits in 32 bits)
+    big_grid = [[0] * 601 for _ in range(601)]
+    big_grid[300][300] = 9
+    assert get_scenic_score_matrix(big_grid)[300][300] == 300**4
+    assert get_best_scenic_location(big_grid) == (300**4, (300, 300))
+
+
+def test_digit_grid():
+    with open("test.txt") as file:
+        grid = get_grid(file.read())
+    digit_grid = DigitGrid.from_file("test.txt", chunk_size=4)
+    assert [list(row) for row in digit_grid] == grid
+    assert get_num_trees_visible(digit_grid) == 21
+    assert is_visible(digit_grid, 1, 1) and not is_visible(digit_grid, 1, 3)
+    assert scenic_score(digit_grid, 3, 2) == 8
+    assert get_best_scenic_location(digit_grid) == (8, (3, 2))
+
+    with tempfile.TemporaryDirectory() as grid_dir:
+        crlf_file = os.path.join(grid_dir, "crlf.txt")
+        with open(crlf_file, "wb") as file:
+            file.write(b"123\r\n456\r\n")
+        try:
+            DigitGrid.from_file(crlf_file)
+            rejected = False
+        except AssertionError:
+            rejected = True
+        assert rejected
+
+
 if __name__ == "__main__":
     with open("input.txt") as file:
         input = file.read()
 
     test_first_example()
+    test_visibility_mask()
     result = part1(input)
     print(f"part 1: {result}")
     assert result == 1814
 
     test_second_example()
+    test_scenic_score_matrix()
     result = part2(input)
     print(f"part 2: {result}")
     assert result == 330786
+
+    test_digit_grid()
+    digit_grid = DigitGrid.from_file("input.txt")
+    assert get_num_trees_visible(digit_grid) == 1814
+    assert get_best_scenic_location(digit_grid)[0] == 330786